@@ -7,14 +7,17 @@ HUGGINGFACE_DATASET = {
 
 # Database
 DEFAULT_DATABASE_NAME = "example-analysis-stats.db"
+INSERT_BATCH_SIZE = 50
+INSERT_FLUSH_INTERVAL = 5
 
 # Analysis configuration
 ANALYSIZER_TEMPLATE = "example-analysis.md"
 DEFAULT_PRESET = "llama-4-scout"
 DEFAULT_LIMIT = 1000
+DEFAULT_CONCURRENCY = 1
 
 # Data
-DATA_COLUMNS = [
+DATA_COLUMNS = (
     "entity_class",
     "geo_focus",
     "temporal_era",
@@ -22,7 +25,10 @@ DATA_COLUMNS = [
     "contains_dates",
     "contains_coordinates",
     "has_see_also",
-]
+)
+
+# Logging
+LOGFILE_BUFFER_SIZE = 65536
 
 # Retry
 RETRY_ATTEMPTS = 3
@@ -1,112 +1,145 @@
 """Handles database operations for storing page analysis data."""
 
+import operator
 import sqlite3
+import threading
+from collections import defaultdict
 from pathlib import Path
 from typing import Any
 
+from . import constants
+
+PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "cache_size=-262144",
+    "mmap_size=268435456",
+)
+ANALYSIS_COLUMNS = ("model", *constants.DATA_COLUMNS)
+_ROW_VALUES = operator.itemgetter(*ANALYSIS_COLUMNS)
+STATS_COLUMNS = ("success_count", "failure_count", "retry_error_count")
+TABLES = {
+    "analysis_data": """
+        CREATE TABLE IF NOT EXISTS analysis_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            model TEXT,
+            entity_class TEXT,
+            geo_focus TEXT,
+            temporal_era TEXT,
+            domain TEXT,
+            contains_dates TEXT,
+            contains_coordinates TEXT,
+            has_see_also TEXT
+        )
+    """,
+    "preset_stats": """
+        CREATE TABLE IF NOT EXISTS preset_stats (
+            preset_name TEXT PRIMARY KEY,
+            success_count INTEGER DEFAULT 0,
+            failure_count INTEGER DEFAULT 0,
+            retry_error_count INTEGER DEFAULT 0
+        )
+    """,
+}
+
 
 class Database:
     """
     Manages interactions with the SQLite database for storing analysis data.
+
+    A single connection is shared by all threads; access to it is serialized
+    with a lock. Preset counters are accumulated in memory and written in
+    bulk by :meth:`flush_stats`.
     """
 
-    def __init__(self, db_path: str | Path) -> None:
+    _INSERT_SQL = f"INSERT INTO analysis_data ({', '.join(ANALYSIS_COLUMNS)}) VALUES ({', '.join('?' * len(ANALYSIS_COLUMNS))})"
+
+    def __init__(self, db_path: str | Path, exclusive_lock: bool = False) -> None:
         """
         Initializes the Database object and ensures the database and table exist.
 
         :param db_path: The path to the SQLite database file.
         :type db_path: Union[str, Path]
+        :param exclusive_lock: Hold the database lock for the life of the connection.
+            Faster for a single writer, but blocks all other readers and writers.
+        :type exclusive_lock: bool
         """
         self.db_path: Path = Path(db_path)
+        self.exclusive_lock: bool = exclusive_lock
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn: sqlite3.Connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.lock: threading.Lock = threading.Lock()
+        self.pending_stats: defaultdict[str, list[int]] = defaultdict(lambda: [0] * len(STATS_COLUMNS))
         self._initialize_db()
 
     def _initialize_db(self) -> None:
         """
-        Creates the database directory and the strike_log table if they don't exist.
+        Configures the connection and creates the analysis_data and preset_stats
+        tables if they don't exist.
+
+        The schema is only touched when sqlite_master shows a table is missing,
+        so opening an existing database takes no write lock.
+
+        WAL journaling with synchronous=NORMAL skips the fsync on every commit;
+        a power loss may drop the most recent commits but cannot corrupt the
+        database.
         """
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS analysis_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    model TEXT,
-                    entity_class TEXT,
-                    geo_focus TEXT,
-                    temporal_era TEXT,
-                    domain TEXT,
-                    contains_dates TEXT,
-                    contains_coordinates TEXT,
-                    has_see_also TEXT
-                )
-                """
-            )
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS preset_stats (
-                    preset_name TEXT PRIMARY KEY,
-                    success_count INTEGER DEFAULT 0,
-                    failure_count INTEGER DEFAULT 0,
-                    retry_error_count INTEGER DEFAULT 0
-                )
-                """
-            )
+        with self.lock, self.conn:
+            cursor = self.conn.cursor()
+            if self.exclusive_lock:
+                cursor.execute("PRAGMA locking_mode=EXCLUSIVE")
+            for pragma in PRAGMAS:
+                cursor.execute(f"PRAGMA {pragma}")
+            existing_tables = {
+                row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
+            missing_tables = [name for name in TABLES if name not in existing_tables]
+            if missing_tables:
+                cursor.execute("BEGIN IMMEDIATE")
+                for name in missing_tables:
+                    cursor.execute(TABLES[name])
 
-    def add_analysis_entry(
+    def add_analysis_entries(
         self,
-        data: dict[str, Any],
+        rows: list[dict[str, Any]],
     ) -> None:
         """
-        Adds a new analysis entry to the database.
+        Adds a batch of analysis entries to the database in a single transaction.
 
-        :param data: Dictionary of data to be inserted.
-        :type data: dict[str, Any]
+        :param rows: List of dictionaries of data to be inserted.
+        :type rows: list[dict[str, Any]]
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO analysis_data (model, entity_class, geo_focus, temporal_era, domain, contains_dates, contains_coordinates, has_see_also) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                (data["model"], data["entity_class"], data["geo_focus"], data["temporal_era"], data["domain"], data["contains_dates"], data["contains_coordinates"], data["has_see_also"]),
+        with self.lock, self.conn:
+            cursor = self.conn.cursor()
+            cursor.executemany(
+                self._INSERT_SQL,
+                map(_ROW_VALUES, rows),
             )
 
-    def increment_success(self, preset_name: str) -> None:
+    def increment_success(self, preset_name: str, count: int = 1) -> None:
         """
         Increments the success count for a given preset.
 
         :param preset_name: The name of the preset.
         :type preset_name: str
+        :param count: The amount to increment by.
+        :type count: int
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO preset_stats (preset_name, success_count)
-                VALUES (?, 1)
-                ON CONFLICT(preset_name) DO UPDATE SET success_count = success_count + 1;
-                """,
-                (preset_name,),
-            )
+        self._bump(preset_name, "success_count", count)
 
-    def increment_failure(self, preset_name: str) -> None:
+    def increment_failure(self, preset_name: str, count: int = 1) -> None:
         """
         Increments the failure count for a given preset.
 
         :param preset_name: The name of the preset.
         :type preset_name: str
+        :param count: The amount to increment by.
+        :type count: int
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO preset_stats (preset_name, failure_count)
-                VALUES (?, 1)
-                ON CONFLICT(preset_name) DO UPDATE SET failure_count = failure_count + 1;
-                """,
-                (preset_name,),
-            )
+        self._bump(preset_name, "failure_count", count)
 
-    def increment_retry_error(self, preset_name: str) -> None:
+    def increment_retry_error(self, preset_name: str, count: int = 1) -> None:
         """
         Increments the retry error count for a given preset.
 
@@ -114,14 +147,60 @@ class Database:
 
         :param preset_name: The name of the preset.
         :type preset_name: str
+        :param count: The amount to increment by.
+        :type count: int
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO preset_stats (preset_name, retry_error_count)
-                VALUES (?, 1)
-                ON CONFLICT(preset_name) DO UPDATE SET retry_error_count = retry_error_count + 1;
-                """,
-                (preset_name,),
-            )
+        self._bump(preset_name, "retry_error_count", count)
+
+    def _bump(self, preset_name: str, column: str, count: int) -> None:
+        """
+        Adds to one of a preset's pending counters.
+
+        Counters are held in memory until :meth:`flush_stats` is called.
+
+        :param preset_name: The name of the preset.
+        :type preset_name: str
+        :param column: The preset_stats column to increment, one of STATS_COLUMNS.
+        :type column: str
+        :param count: The amount to increment by.
+        :type count: int
+        """
+        index = STATS_COLUMNS.index(column)
+        with self.lock:
+            self.pending_stats[preset_name][index] += count
+
+    def flush_stats(self) -> None:
+        """
+        Writes all pending preset counters to the preset_stats table in one transaction.
+
+        Pending counters are only cleared once the write succeeds.
+
+        :raises sqlite3.DatabaseError: If the write fails.
+        """
+        with self.lock:
+            if not self.pending_stats:
+                return
+            with self.conn:
+                cursor = self.conn.cursor()
+                cursor.executemany(
+                    """
+                    INSERT INTO preset_stats (preset_name, success_count, failure_count, retry_error_count)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(preset_name) DO UPDATE SET
+                        success_count = success_count + excluded.success_count,
+                        failure_count = failure_count + excluded.failure_count,
+                        retry_error_count = retry_error_count + excluded.retry_error_count;
+                    """,
+                    [(preset_name, *counts) for preset_name, counts in self.pending_stats.items()],
+                )
+            self.pending_stats.clear()
+
+    def close(self) -> None:
+        """
+        Flushes pending preset counters and closes the underlying database connection.
+        """
+        try:
+            self.flush_stats()
+        finally:
+            with self.lock:
+                self.conn.close()
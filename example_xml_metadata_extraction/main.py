@@ -1,35 +1,124 @@
+from __future__ import annotations
+
 import sys
 import re
 import argparse
 import logging
 import os
 import tempfile
-import uuid
+import itertools
+import secrets
 import datetime
 import pprint
-import xml.etree.ElementTree as ET
-import traceback
-import time
 import signal
+import time
+import functools
+import threading
+import queue
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
 import sqlite3
 import io
 from lxml import etree
-from tenacity import retry, stop_after_attempt, wait_fixed, RetryError
-from typing import Any
-from dotenv import find_dotenv, load_dotenv
-import datasets
-
-from lwe.core.config import Config
-from lwe.backends.api.backend import ApiBackend
-
+from collections.abc import Callable, Iterator
+from typing import TYPE_CHECKING, Any, TextIO, TypeVar
 
 from .logger import Logger
 from .config import set_environment_variables
 from . import constants
 from .database import Database
 
-load_dotenv(find_dotenv(usecwd=True))
+# datasets and lwe pull in large dependency trees, so they are imported where
+# they are used to keep startup (and --help) fast.
+if TYPE_CHECKING:
+    import datasets
+    from lwe.backends.api.backend import ApiBackend
+
+_ANALYSIS_RE = re.compile(r"<analysis>(.*?)</analysis>", re.DOTALL)
+_ANALYSIS_KEYS = frozenset((*constants.DATA_COLUMNS, "reasoning"))
+# Tag names the no-schema fast path handles itself; anything else (attributes,
+# whitespace, namespaces) is left to the XML parser.
+_BARE_TAG_RE = re.compile(r"[A-Za-z_][\w.-]*", re.ASCII)
+# Text the XML parser would reject or rewrite inside a CDATA section.
+_UNSAFE_TEXT_RE = re.compile(r"]]>|[\x00-\x08\x0b-\x1f\ud800-\udfff\ufffe\uffff]")
+# Page identifiers only need to be unique within a run; seed once per process
+# so each call is a counter bump rather than a trip to the OS random source.
+_PAGE_IDENTIFIERS = itertools.count(secrets.randbits(32))
+# Queued after the last result to tell the writer thread to flush and exit.
+_WRITER_STOP = object()
+
+
+@functools.lru_cache(maxsize=256)
+def _normalize_tag(tag: str) -> str:
+    """
+    Convert an XML tag name to its metadata key, e.g. ``geo-focus`` to ``geo_focus``.
+
+    The set of tags emitted by the template is small, so results are memoized.
+
+    :param tag: XML tag name
+    :type tag: str
+    :return: Normalized metadata key
+    :rtype: str
+    """
+    return tag.lower().replace("-", "_")
+
+
+def _find_children(xml_content: str) -> Iterator[tuple[int, int, str, str]]:
+    """
+    Find each ``<tag>text</tag>`` pair in a single left-to-right scan.
+
+    Matches the same spans as the pattern ``<([^>]+)>(.*?)</\\1>`` with DOTALL,
+    but locates delimiters with ``str.find`` instead of regex backtracking.
+
+    :param xml_content: Raw XML content to scan
+    :type xml_content: str
+    :return: Iterator of (start, end, tag, text) for each pair found
+    :rtype: Iterator[tuple[int, int, str, str]]
+    """
+    pos = 0
+    while True:
+        start = xml_content.find("<", pos)
+        if start == -1:
+            return
+        tag_end = xml_content.find(">", start + 1)
+        if tag_end == -1:
+            return
+        tag = xml_content[start + 1:tag_end]
+        close_start = xml_content.find(f"</{tag}>", tag_end + 1) if tag else -1
+        if close_start == -1:
+            pos = start + 1
+            continue
+        end = close_start + len(tag) + 3
+        yield start, end, tag, xml_content[tag_end + 1:close_start]
+        pos = end
+
+
+def _scan_children(xml_content: str) -> list[tuple[str, str]] | None:
+    """
+    Read ``<tag>text</tag>`` pairs without building an XML tree.
+
+    Only content the XML parse would accept unchanged is handled: bare tag
+    names, whitespace between pairs, and text that is safe inside CDATA.
+
+    :param xml_content: Raw XML content from inside the analysis tags
+    :type xml_content: str
+    :return: List of (tag, text) pairs, or None if the content needs a full XML parse
+    :rtype: list[tuple[str, str]] | None
+    """
+    children = []
+    pos = 0
+    for start, end, tag, text in _find_children(xml_content):
+        if (
+            xml_content[pos:start].strip()
+            or not _BARE_TAG_RE.fullmatch(tag)
+            or _UNSAFE_TEXT_RE.search(text)
+        ):
+            return None
+        children.append((tag, text))
+        pos = end
+    if xml_content[pos:].strip():
+        return None
+    return children
 
 
 class ParserError(ValueError):
@@ -40,6 +129,15 @@ class AnalyzerError(RuntimeError):
     pass
 
 
+class RetryError(RuntimeError):
+    def __init__(self, last_exception: Exception) -> None:
+        super().__init__(f"All retry attempts failed: {last_exception}")
+        self.last_exception: Exception = last_exception
+
+
+T = TypeVar("T")
+
+
 class PagesAnalyzer:
     def __init__(self, args: argparse.Namespace) -> None:
         """
@@ -52,19 +150,57 @@ class PagesAnalyzer:
         """
         self.debug: bool = args.debug
         self.log: logging.Logger = Logger(self.__class__.__name__, debug=self.debug)
-        self.database: Database = Database(args.database)
+        self.database: Database = Database(args.database, exclusive_lock=args.exclusive_db_lock)
         self.template: str = args.template
         self.logfile: str | None = args.logfile
+        self.logfile_handle: TextIO | None = None
+        self.logfile_lock: threading.Lock = threading.Lock()
         self.xsd_path: Path | None = Path(args.xsd) if args.xsd else None
         self.xsd_content: str | None = None
+        self.xml_schema: etree.XMLSchema | None = None
+        self.xml_schema_lock: threading.Lock = threading.Lock()
         self.preset: str = args.preset
         self.offset: int = args.offset
         self.limit: int = args.limit
         self.pause: int = args.pause
+        self.concurrency: int = args.concurrency
         self.running: bool = False
+        self._shutdown: threading.Event = threading.Event()
+        self.write_queue: queue.Queue[Any] = queue.Queue()
+        self.xml_parser: etree.XMLParser = etree.XMLParser(resolve_entities=False, huge_tree=False)
         set_environment_variables()
         self._load_xsd_content()
-        self.analyzer: ApiBackend = self._initialize_lwe_backend()
+        self._thread_state: threading.local = threading.local()
+        self._idle_backends: queue.SimpleQueue[ApiBackend] = queue.SimpleQueue()
+        self._idle_backends.put(self._initialize_lwe_backend())
+
+    @property
+    def analyzer(self) -> ApiBackend:
+        """
+        Get the LWE backend assigned to the current worker thread.
+
+        :return: Configured ApiBackend instance
+        :rtype: ApiBackend
+        """
+        return self._thread_state.analyzer
+
+    def _initialize_worker(self) -> None:
+        """
+        Assign an LWE backend to the current worker thread.
+
+        Backends hold per-request state, so each worker thread gets its own.
+        The backend built at startup is handed to the first worker; further
+        workers build theirs here, and a failure breaks the pool and aborts
+        the run.
+
+        :return: None
+        :rtype: None
+        """
+        try:
+            backend = self._idle_backends.get_nowait()
+        except queue.Empty:
+            backend = self._initialize_lwe_backend()
+        self._thread_state.analyzer = backend
 
     def _initialize_lwe_backend(self) -> ApiBackend:
         """
@@ -74,6 +210,9 @@ class PagesAnalyzer:
         :rtype: ApiBackend
         :raises ValueError: If required environment variables are missing
         """
+        from lwe.core.config import Config
+        from lwe.backends.api.backend import ApiBackend
+
         config_args = {}
         config_dir = os.environ.get("LWE_CONFIG_DIR")
         data_dir = os.environ.get("LWE_DATA_DIR")
@@ -94,9 +233,9 @@ class PagesAnalyzer:
 
     def _load_xsd_content(self) -> None:
         """
-        Load XSD file content if an XSD path is provided.
+        Load and compile the XSD schema if an XSD path is provided.
 
-        :raises SystemExit: If the XSD file is not found.
+        :raises SystemExit: If the XSD file is not found or is not a valid schema.
         """
         if self.xsd_path:
             try:
@@ -104,6 +243,11 @@ class PagesAnalyzer:
             except FileNotFoundError:
                 self.log.error(f"XSD file not found at: {self.xsd_path}")
                 sys.exit(1)
+            try:
+                self.xml_schema = etree.XMLSchema(etree.parse(io.StringIO(self.xsd_content)))
+            except (etree.XMLSyntaxError, etree.XMLSchemaParseError) as e:
+                self.log.error(f"Invalid XSD schema at {self.xsd_path}: {e}")
+                sys.exit(1)
 
     def analyze_pages(self) -> int:
         """
@@ -113,51 +257,174 @@ class PagesAnalyzer:
         :rtype: int
         """
         processed = 0
+        in_flight: set[Future[dict[str, Any] | None]] = set()
         pages = self.load_pages()
-        for page in pages:
-            if not self.running:
-                break
-            self.process_page_try(dict(page)["text"])
-            processed += 1
-            if self.pause > 0:
-                self.log.info(f"Pausing for {self.pause} seconds")
-                time.sleep(self.pause)
+        with ThreadPoolExecutor(max_workers=self.concurrency, initializer=self._initialize_worker) as executor:
+            try:
+                for page in pages:
+                    if len(in_flight) >= self.concurrency:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        processed += self._collect_results(done)
+                    if not self.running:
+                        break
+                    in_flight.add(executor.submit(self.process_page_and_pause, page["text"]))
+            finally:
+                done, in_flight = wait(in_flight)
+                processed += self._collect_results(done)
         return processed
 
-    def load_pages(self) -> datasets.arrow_dataset.Dataset:
-        self.log.info(f"Downloading dataset: {constants.HUGGINGFACE_DATASET}")
-        dataset: datasets.arrow_dataset.Dataset = datasets.load_dataset(**constants.HUGGINGFACE_DATASET, split="train")  # pyright: ignore[reportAssignmentType, reportArgumentType]
-        self.log.info(f"Dataset size: {len(dataset)}")
+    def _collect_results(self, done: set[Future[dict[str, Any] | None]]) -> int:
+        """
+        Hand finished page analyses to the writer thread.
+
+        Every successful result is queued before the first failed future's
+        exception is re-raised, so one failure does not discard the others.
+
+        :param done: Completed page analysis futures
+        :type done: set[Future[dict[str, Any] | None]]
+        :return: Number of pages collected
+        :rtype: int
+        :raises BaseException: The first exception raised by a page analysis
+        """
+        error: BaseException | None = None
+        for future in done:
+            exception = future.exception()
+            if exception is not None:
+                error = error or exception
+                continue
+            results = future.result()
+            if results is not None:
+                self.write_queue.put(results)
+        if error is not None:
+            raise error
+        return len(done)
+
+    def write_results(self) -> None:
+        """
+        Drain the write queue, inserting analysis results in batches.
+
+        Runs on the writer thread so database commits overlap with LLM requests.
+        A batch is written once it reaches INSERT_BATCH_SIZE, when no new result
+        arrives for INSERT_FLUSH_INTERVAL seconds, or when the stop sentinel is
+        received.
+
+        :return: None
+        :rtype: None
+        """
+        pending: list[dict[str, Any]] = []
+        while True:
+            try:
+                item = self.write_queue.get(timeout=constants.INSERT_FLUSH_INTERVAL if pending else None)
+            except queue.Empty:
+                item = None
+            stop = item is _WRITER_STOP
+            if item is not None and not stop:
+                pending.append(item)
+                if len(pending) < constants.INSERT_BATCH_SIZE:
+                    continue
+            if pending:
+                self.insert_analysis_try(pending)
+                pending = []
+            if stop:
+                return
+
+    def load_pages(self) -> datasets.IterableDataset:
+        """
+        Stream the requested window of pages from the dataset.
+
+        Pages are fetched lazily as they are iterated, so only the pages
+        between offset and offset + limit are ever decoded.
+
+        :return: Iterable of dataset rows
+        :rtype: datasets.IterableDataset
+        """
+        import datasets
+
+        self.log.info(f"Streaming dataset: {constants.HUGGINGFACE_DATASET}")
+        dataset: datasets.IterableDataset = datasets.load_dataset(**constants.HUGGINGFACE_DATASET, split="train", streaming=True)  # pyright: ignore[reportAssignmentType, reportArgumentType]
         if self.debug:
-            for i in range(constants.DEBUG_DATASET_SIZE):
-                if len(dataset[i]["text"].strip()) > constants.DATA_LENGTH_THRESHOLD:
+            for i, page in enumerate(dataset.take(constants.DEBUG_DATASET_SIZE)):
+                if len(page["text"].strip()) > constants.DATA_LENGTH_THRESHOLD:
                     print("")
                     print("")
                     print(f"## Datapoint {i + 1}")
                     print("")
-                    print(dataset[i]["text"])
-        return dataset.select(range(self.offset, self.offset + self.limit))
+                    print(page["text"])
+        return dataset.skip(self.offset).take(self.limit)
+
+    def process_page_and_pause(self, text: str) -> dict[str, Any] | None:
+        """
+        Process a single page, then pause before the worker takes its next page.
+
+        The pause starts once the analysis has finished, so each worker waits
+        --pause seconds between its analyses.
+
+        :param text: Page text
+        :type text: str
+        :return: Dictionary containing analysis results, or None if all attempts failed
+        :rtype: dict[str, Any] | None
+        """
+        results = self.process_page_try(text)
+        if self.pause > 0:
+            self.log.info(f"Pausing for {self.pause} seconds")
+            self._shutdown.wait(self.pause)
+        return results
 
     def process_page_try(
         self,
         text: str,
-    ) -> None:
+    ) -> dict[str, Any] | None:
         """
         Process a single page through the analysis pipeline.
 
         :param text: Page text
         :type text: str
+        :return: Dictionary containing analysis results, or None if all attempts failed
+        :rtype: dict[str, Any] | None
         """
         try:
-            self.process_page(text)
+            return self.run_with_retries(self.process_page, text, stop=self._shutdown)
         except RetryError as e:
+            if self._shutdown.is_set():
+                self.log.warning(f"Abandoning page after interrupt. Last error: {e.last_exception}")
+                return None
             self.database.increment_failure(self.preset)
-            self.log.error(f"Analysis failed using model {self.preset}. Original error: {e.last_attempt.exception()}")
+            self.log.error(f"Analysis failed using model {self.preset}. Original error: {e.last_exception}")
+            return None
+
+    def run_with_retries(self, func: Callable[..., T], *args: Any, stop: threading.Event | None = None) -> T:
+        """
+        Call a function, retrying on any exception up to RETRY_ATTEMPTS times.
+
+        Waits RETRY_DELAY seconds between attempts. If a stop event is given,
+        the wait wakes as soon as it is set and no further attempts are made.
+
+        :param func: The function to call
+        :type func: Callable[..., T]
+        :param args: Positional arguments for the function
+        :type args: Any
+        :param stop: Event that cancels any remaining attempts when set
+        :type stop: threading.Event | None
+        :return: The function's return value
+        :rtype: T
+        :raises RetryError: If every attempt fails or retries are stopped, wrapping the last exception
+        """
+        attempt = 1
+        while True:
+            try:
+                return func(*args)
+            except Exception as e:
+                if attempt >= constants.RETRY_ATTEMPTS:
+                    raise RetryError(e) from e
+                if stop is None:
+                    time.sleep(constants.RETRY_DELAY)
+                elif stop.wait(constants.RETRY_DELAY):
+                    raise RetryError(e) from e
+            attempt += 1
 
-    @retry(stop=stop_after_attempt(constants.RETRY_ATTEMPTS), wait=wait_fixed(constants.RETRY_DELAY))
     def process_page(
         self, text: str,
-    ) -> None:
+    ) -> dict[str, Any]:
         """
         Process a single page through the analysis pipeline.
 
@@ -167,21 +434,17 @@ class PagesAnalyzer:
         :rtype: dict[str, Any]
         :raises ParserError: If analysis response cannot be parsed
         :raises AnalyzerError: If analysis fails
-        :raises sqlite3.DatabaseError: If database data insertion fails
         :raises lxml.etree.DocumentInvalid: If XML validation against XSD fails.
-        :raises lxml.etree.XMLSyntaxError: If the XML is malformed.
         """
         try:
             response = self.perform_analysis(text)
             parsed_results = self.parse_analysis(response)
             self.log_analysis(parsed_results)
-            self.insert_analysis(parsed_results)
-        except (ParserError, AnalyzerError, sqlite3.DatabaseError, etree.DocumentInvalid, etree.XMLSyntaxError) as e:
-            self.log.error(f"Error processing page: {e}")
+        except (ParserError, AnalyzerError, etree.DocumentInvalid) as e:
+            self.log.error(f"Error processing page: {e}", exc_info=self.debug)
             self.database.increment_retry_error(self.preset)
-            if self.debug:
-                _ = traceback.format_exc()
             raise
+        return parsed_results
 
     def log_analysis(
         self, results: dict[str, Any]
@@ -194,14 +457,13 @@ class PagesAnalyzer:
         :return: None
         :rtype: None
         """
-        if self.logfile:
-            self.log.debug(f"Logging analysis for page to {self.logfile}")
+        if self.logfile_handle:
+            self.log.debug("Logging analysis for page to %s", self.logfile)
             reasoning = results.get("reasoning", "")
             metadata = {}
             for m_type in constants.DATA_COLUMNS:
                 metadata[m_type] = results.get(m_type, "")
-            with Path(self.logfile).open("a") as f:
-                output = f"""
+            output = f"""
 ###############################################################################
 Reasoning:
 {reasoning}
@@ -210,7 +472,8 @@ Metadata:
 {pprint.pformat(metadata)}
 ###############################################################################
 """
-                _ = f.write(output)
+            with self.logfile_lock:
+                _ = self.logfile_handle.write(output)
 
     def perform_analysis(self, text: str) -> str:
         """
@@ -222,7 +485,7 @@ Metadata:
         :rtype: str
         :raises AnalyzerError: If template execution fails
         """
-        identifier = uuid.uuid4().hex[:8]
+        identifier = f"{next(_PAGE_IDENTIFIERS) & 0xFFFFFFFF:08x}"
         template_vars = {"article_text": text, "identifier": identifier}
         overrides = {
             "request_overrides": {
@@ -236,7 +499,7 @@ Metadata:
             raise AnalyzerError(
                 f"Error running template {self.template}: {user_message}"
             )
-        self.log.debug(f"Analysis result: {response}")
+        self.log.debug("Analysis result: %s", response)
         return str(response)
 
     def escape_xml_content(self, xml_content: str) -> str:
@@ -248,121 +511,168 @@ Metadata:
         :return: Escaped XML content with CDATA sections
         :rtype: str
         """
-
-        def replace_text(match: re.Match[str]) -> str:
-            tag = match.group(1)
-            text = match.group(2)
-            return f"<{tag}><![CDATA[{text}]]></{tag}>"
-
-        escaped_content = re.sub(
-            r"<([^>]+)>(.*?)</\1>", replace_text, xml_content, flags=re.DOTALL
-        )
+        parts = []
+        pos = 0
+        for start, end, tag, text in _find_children(xml_content):
+            parts.append(xml_content[pos:start])
+            parts.append(f"<{tag}><![CDATA[{text}]]></{tag}>")
+            pos = end
+        parts.append(xml_content[pos:])
+        escaped_content = "".join(parts)
         return escaped_content
 
-    def _validate_xml(self, xml_string: str) -> None:
+    def _validate_xml(self, root: etree._Element) -> None:
         """
-        Validate an XML string against the instance's XSD schema.
+        Validate a parsed XML element against the instance's XSD schema.
 
-        :param xml_string: The XML string to validate.
-        :type xml_string: str
+        :param root: The parsed root element to validate.
+        :type root: lxml.etree._Element
         :raises: lxml.etree.DocumentInvalid if validation fails.
-        :raises: lxml.etree.XMLSyntaxError if XML is malformed.
         """
-        if not self.xsd_content:
+        if not self.xml_schema:
             return
         try:
-            xmlschema_doc = etree.parse(io.StringIO(self.xsd_content))
-            xmlschema = etree.XMLSchema(xmlschema_doc)
-            llm_doc = etree.parse(io.StringIO(xml_string))
-            xmlschema.assertValid(llm_doc)
-            self.log.debug(f"XML is valid according to XSD: {self.xsd_path}")
-        except (etree.DocumentInvalid, etree.XMLSyntaxError) as e:
+            # The schema's error log is shared, so validations are serialized.
+            with self.xml_schema_lock:
+                self.xml_schema.assertValid(root)
+            self.log.debug("XML is valid according to XSD: %s", self.xsd_path)
+        except etree.DocumentInvalid as e:
             self.log.error(f"XML validation failed: {e}")
             raise
 
+    def _parse_xml_children(self, xml_content: str) -> list[tuple[str, str]]:
+        """
+        Sanitize, parse and validate analysis XML, returning its child elements.
+
+        :param xml_content: Raw XML content from inside the analysis tags
+        :type xml_content: str
+        :return: List of (tag, text) pairs for each child element
+        :rtype: list[tuple[str, str]]
+        :raises ParserError: If XML parsing fails
+        :raises lxml.etree.DocumentInvalid: If XML validation against XSD fails.
+        """
+        escaped_content = self.escape_xml_content(xml_content)
+        self.log.debug("Escaped XML content: %s", escaped_content)
+        wrapped_content = f"<analysis>{escaped_content}</analysis>"
+        try:
+            root = etree.fromstring(wrapped_content.encode("utf-8"), self.xml_parser)
+        except etree.XMLSyntaxError as e:
+            raise ParserError(f"Error parsing analysis XML: {e}")
+        self._validate_xml(root)
+        return [(child.tag, child.text or "") for child in root.iterchildren(etree.Element)]
+
     def parse_analysis(self, text: str) -> dict[str, Any]:
         """
         Parse the analysis response text into a structured dictionary.
 
+        Without an XSD schema, simple child tags are read directly from the
+        response; anything else is sanitized and parsed as XML.
+
         :param text: Raw analysis response text containing XML
         :type text: str
         :return: Dictionary of parsed analysis results
         :rtype: dict[str, Any]
         :raises ParserError: If XML parsing fails or required sections are missing
         :raises lxml.etree.DocumentInvalid: If XML validation against XSD fails.
-        :raises lxml.etree.XMLSyntaxError: If the XML is malformed.
         """
-        headers_match = re.search(r"<analysis>(.*?)</analysis>", text, re.DOTALL)
+        headers_match = _ANALYSIS_RE.search(text)
         if not headers_match:
             raise ParserError("No analysis section found in the text")
         xml_content = headers_match.group(1).strip()
-        self.log.debug(f"Original XML content: {xml_content}")
-        escaped_content = self.escape_xml_content(xml_content)
-        self.log.debug(f"Escaped XML content: {escaped_content}")
-        wrapped_content = f"<analysis>{escaped_content}</analysis>"
-        if self.xsd_path:
-            self._validate_xml(wrapped_content)
-        try:
-            root = ET.fromstring(wrapped_content)
-        except ET.ParseError as e:
-            raise ParserError(f"Error parsing analysis XML: {e}")
-        metadata = {}
-        all_columns = constants.DATA_COLUMNS + ["reasoning"]
-        for child in root:
-            key_lower = child.tag.lower().replace("-", "_")
-            value = child.text.strip() if child.text else ""
-            if key_lower in all_columns and value:
+        self.log.debug("Original XML content: %s", xml_content)
+        # Nothing needs the XML tree without a schema to validate against, so
+        # take the tag/text pairs straight from the scan when it is unambiguous.
+        children = None if self.xml_schema else _scan_children(xml_content)
+        if children is None:
+            children = self._parse_xml_children(xml_content)
+        metadata: dict[str, Any] = {}
+        for tag, text in children:
+            key_lower = _normalize_tag(tag)
+            value = text.strip()
+            if key_lower in _ANALYSIS_KEYS and value:
                 metadata[key_lower] = value
-        self.log.debug(f"Parsed data: {metadata}")
-        if set(metadata.keys()) != set(all_columns):
-            missing_keys = set(all_columns) - set(metadata.keys())
-            raise ParserError(f"Missing required metadata in analysis XML: {sorted(list(missing_keys))}")
+        self.log.debug("Parsed data: %s", metadata)
+        if metadata.keys() != _ANALYSIS_KEYS:
+            missing_keys = _ANALYSIS_KEYS - metadata.keys()
+            raise ParserError(f"Missing required metadata in analysis XML: {sorted(missing_keys)}")
         return metadata
 
+    def insert_analysis_try(
+        self, results: list[dict[str, Any]]
+    ) -> None:
+        """
+        Insert a batch of analysis results, recording a failure for each page if all attempts fail.
+
+        Pending preset stats are flushed afterwards.
+
+        :param results: List of dictionaries containing analysis results
+        :type results: list[dict[str, Any]]
+        :return: None
+        :rtype: None
+        """
+        try:
+            self.run_with_retries(self.insert_analysis, results)
+        except RetryError as e:
+            self.database.increment_failure(self.preset, len(results))
+            self.log.error(f"Insert of {len(results)} pages failed for preset {self.preset}. Original error: {e.last_exception}")
+        self.flush_stats()
+
+    def flush_stats(self) -> None:
+        """
+        Write pending preset stats to the database.
+
+        On failure the counters stay pending and are retried on the next flush.
+
+        :return: None
+        :rtype: None
+        """
+        try:
+            self.database.flush_stats()
+        except sqlite3.DatabaseError as e:
+            self.log.error(f"Could not save preset stats: {e}", exc_info=self.debug)
+
     def insert_analysis(
-        self, results: dict[str, Any]
+        self, results: list[dict[str, Any]]
     ) -> None:
         """
-        Insert analysis results into the database for a page.
+        Insert a batch of analysis results into the database in a single transaction.
 
-        :param results: Dictionary containing analysis results
-        :type results: dict[str, Any]
+        :param results: List of dictionaries containing analysis results
+        :type results: list[dict[str, Any]]
         :return: None
         :rtype: None
         :raises sqlite3.DatabaseError: If database operations fail
         """
         try:
             self.insert_analysis_results(results)
-            self.database.increment_success(self.preset)
+            self.database.increment_success(self.preset, len(results))
             self.log.info(
-                f"Page committed for preset: {self.preset}"
+                f"{len(results)} pages committed for preset: {self.preset}"
             )
         except sqlite3.DatabaseError as e:
             self.log.info(
-                f"Page error for preset: {self.preset}. Error: {e}"
+                f"Page batch error for preset: {self.preset}. Error: {e}", exc_info=self.debug
             )
-            if self.debug:
-                traceback.print_exc()
+            self.database.increment_retry_error(self.preset)
             raise
 
-    def insert_analysis_results(self, results: dict[str, Any]):
-        results["model"] = self.preset
-        self.database.add_analysis_entry(results)
+    def insert_analysis_results(self, results: list[dict[str, Any]]):
+        for result in results:
+            result["model"] = self.preset
+        self.database.add_analysis_entries(results)
 
     def process_batches(self) -> int:
         """
-        Process multiple batches of pages up to the specified limit.
+        Process the requested window of pages.
+
+        The window is a single stream, so it is consumed exactly once; if it
+        holds fewer than limit pages, the run ends when the stream does.
 
         :return: Number of pages processed
         :rtype: int
         """
-        total_processed = 0
-        while True:
-            processed = self.analyze_pages()
-            total_processed += processed
-            if not self.running or processed == 0 or (self.limit > 0 and total_processed >= self.limit):
-                self.log.info(f"Processed {total_processed} pages.")
-                break
+        total_processed = self.analyze_pages()
+        self.log.info(f"Processed {total_processed} pages.")
         return total_processed
 
     def run_single(self) -> int:
@@ -374,12 +684,43 @@ Metadata:
         """
         self.running = True
         self.log.info("Starting analysis run")
-        total_processed = self.process_batches()
+        writer = threading.Thread(target=self.write_results, name="ResultWriter", daemon=True)
+        writer.start()
+        try:
+            total_processed = self.process_batches()
+        finally:
+            self.write_queue.put(_WRITER_STOP)
+            writer.join()
         return total_processed
 
+    def stop(self) -> None:
+        """
+        Stop processing new pages and wake any pause in progress.
+
+        :return: None
+        :rtype: None
+        """
+        self.running = False
+        self._shutdown.set()
+
+    def close(self) -> None:
+        """
+        Flush and close the analysis logfile and the database connection.
+
+        :return: None
+        :rtype: None
+        """
+        if self.logfile_handle:
+            with self.logfile_lock:
+                self.logfile_handle.close()
+                self.logfile_handle = None
+        self.database.close()
+
     def setup_analysis_logfile(self, logfile: str | None) -> None:
         """
-        Initialize the analysis logfile with timestamp header.
+        Open the analysis logfile and write a timestamp header.
+
+        The file is kept open for the rest of the run; see :meth:`close`.
 
         :param logfile: Path to the logfile, or None to disable logging
         :type logfile: str | None
@@ -390,8 +731,8 @@ Metadata:
         if logfile is not None:
             now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             try:
-                with Path(logfile).open("a") as f:
-                    _ = f.write(f"Starting at: {now}\n\n")
+                self.logfile_handle = Path(logfile).open("a", buffering=constants.LOGFILE_BUFFER_SIZE)
+                _ = self.logfile_handle.write(f"Starting at: {now}\n\n")
                 self.log.debug(f"Opened analysis logfile {logfile} at {now}")
             except OSError as e:
                 self.log.error(f"Could not open logfile {logfile} for writing: {e}")
@@ -411,6 +752,11 @@ def parse_arguments() -> argparse.Namespace:
         default=os.environ.get("ANALYZER_DB_NAME", constants.DEFAULT_DATABASE_NAME),
         help="Database name, default: environment variable ANALYZER_DB_NAME or %(default)s",
     )
+    parser.add_argument(
+        "--exclusive-db-lock",
+        action="store_true",
+        help="Hold an exclusive lock on the database for the whole run (faster, but blocks other readers)",
+    )
     parser.add_argument(
         "--template",
         default=constants.ANALYSIZER_TEMPLATE,
@@ -440,14 +786,22 @@ def parse_arguments() -> argparse.Namespace:
         type=int,
         help="Limit number of pages to analyze, default: %(default)s",
     )
+    parser.add_argument(
+        "--concurrency",
+        default=constants.DEFAULT_CONCURRENCY,
+        type=int,
+        help="Number of pages to analyze concurrently, default: %(default)s",
+    )
     parser.add_argument(
         "--pause",
         default=0,
         type=float,
-        help="Pause this number of seconds between analyses, default: no pause",
+        help="Pause this number of seconds after each analysis before the next one starts (per concurrent worker), default: no pause",
     )
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
     args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
     return args
 
 
@@ -466,7 +820,7 @@ def signal_handler(sig: int, _frame: Any, analyzer: PagesAnalyzer) -> None:
     """
     if sig == signal.SIGINT:
         analyzer.log.info("Received interrupt signal, stopping gracefully...")
-        analyzer.running = False
+        analyzer.stop()
 
 def main() -> None:
     """
@@ -479,6 +833,9 @@ def main() -> None:
     :rtype: None
     :raises SystemExit: If logfile cannot be opened
     """
+    from dotenv import find_dotenv, load_dotenv
+
+    load_dotenv(find_dotenv(usecwd=True))
     args = parse_arguments()
     analyzer = PagesAnalyzer(args)
     analyzer.setup_analysis_logfile(args.logfile)
@@ -486,7 +843,10 @@ def main() -> None:
     # Set up signal handler for graceful interruption
     signal.signal(signal.SIGINT, lambda sig, frame: signal_handler(sig, frame, analyzer))
 
-    analyzer.run_single()
+    try:
+        analyzer.run_single()
+    finally:
+        analyzer.close()
 
 
 if __name__ == "__main__":